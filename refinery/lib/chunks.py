@@ -41,18 +41,26 @@ def pack(data, blocksize, bigendian=False):
     """
     if blocksize == 1:
         return bytes(data)
-    if blocksize in (2, 4, 8):
+    if blocksize <= 8:
         try:
             import numpy
         except ModuleNotFoundError:
             numpy = None
         order = '<>'[bigendian]
         if numpy:
-            dtype = numpy.dtype(F'{order}u{blocksize}')
-            return numpy.fromiter(data, dtype).tobytes()
-        else:
+            if blocksize in (2, 4, 8):
+                dtype = numpy.dtype(F'{order}u{blocksize}')
+                return numpy.fromiter(data, dtype).tobytes()
+            array = numpy.fromiter(data, numpy.dtype(F'{order}u8'))
+            if (array >> (8 * blocksize)).any():
+                raise OverflowError('int too big to convert')
+            array = array.view(numpy.uint8).reshape(-1, 8)
+            array = array[:, 8 - blocksize:] if bigendian else array[:, :blocksize]
+            return array.tobytes()
+        elif blocksize in (2, 4, 8):
             import struct
             scode = {2: 'H', 4: 'L', 8: 'Q'}[blocksize]
+            data = tuple(data)
             return struct.pack(F'{order}{len(data)}{scode}', *data)
     byteorder = ('little', 'big')[bigendian]
     return B''.join(number.to_bytes(blocksize, byteorder) for number in data)
@@ -5,8 +5,14 @@ Microsoft Crypto API structures
 """
 import enum
 
-from Crypto.PublicKey import RSA
-from Crypto.Math.Numbers import Integer
+from typing import Iterable, List
+
+try:
+    from gmpy2 import mpz, gcd, f_mod
+except ImportError:
+    from math import gcd
+    from operator import mod as f_mod
+    mpz = int
 
 from .structures import Struct, StructReader
 
@@ -79,11 +85,15 @@ class ALGORITHMS(_ENUM):
     CALG_TLS1PRF               = 0x0000800a # noqa
 
 
+_TYPE_LOOKUP = {m.value: m for m in TYPES}
+_ALGORITHM_LOOKUP = {m.value: m for m in ALGORITHMS}
+
+
 class BLOBHEADER(Struct):
     def __init__(self, reader: StructReader):
         t, self.version, self.reserved, a = reader.read_struct('=BBHI')
-        self.type = TYPES(t)
-        self.algorithm = ALGORITHMS(a)
+        self.type = _TYPE_LOOKUP.get(t) or TYPES(t)
+        self.algorithm = _ALGORITHM_LOOKUP.get(a) or ALGORITHMS(a)
 
 
 class PLAINTEXTKEYBLOB(Struct):
@@ -110,16 +120,27 @@ class RSAPUBKEY(Struct):
             raise ValueError(F'The bitlength {self.size} is not a multiple of 8.')
         self.size //= 8
         self.modulus = reader.read_bigint(self.size)
+        self._key = None
+        self._pem = None
 
     def convert(self):
-        return RSA.construct((self.modulus, self.exponent))
+        if self._key is None:
+            from Crypto.PublicKey import RSA
+            self._key = RSA.construct((self.modulus, self.exponent))
+        return self._key
+
+    @property
+    def pem(self) -> str:
+        if self._pem is None:
+            self._pem = self.convert().export_key(format='PEM').decode('ascii')
+        return self._pem
 
     def __str__(self):
-        return self.key().export_key(format='PEM')
+        return self.pem
 
 
 class PRIVATEKEYBLOB(Struct):
-    def __init__(self, reader: StructReader):
+    def __init__(self, reader: StructReader, validate: bool = True):
         self.pub = RSAPUBKEY(reader)
         halfsize = self.pub.size // 2
         self.prime1 = reader.read_bigint(halfsize)
@@ -127,45 +148,65 @@ class PRIVATEKEYBLOB(Struct):
         self.exp1 = reader.read_bigint(halfsize)
         self.exp2 = reader.read_bigint(halfsize)
         self.coefficient = reader.read_bigint(halfsize)
-        self.exponent = reader.read_bigint(halfsize)
-        self._check()
+        self.exponent = reader.read_bigint(self.pub.size)
+        self._key = None
+        self._pem = None
+        self._checked = False
+        if validate:
+            self._check()
 
     def _check(self):
-        if self.pub.modulus // self.prime1 != self.prime2:
+        if self._checked:
+            return
+        n = mpz(self.pub.modulus)
+        e = mpz(self.pub.exponent)
+        d = mpz(self.exponent)
+        p = mpz(self.prime1)
+        q = mpz(self.prime2)
+        if p < 2 or q < 2 or p * q != n:
             raise ValueError('Product of primes does not equal the modulus.')
-        from math import gcd
-        a = self.prime1 - 1
-        b = self.prime2 - 1
+        a = p - 1
+        b = q - 1
         totient = (a * b) // gcd(a, b)
-        if self.pub.exponent * self.exponent % totient != 1:
+        if f_mod(e * d, totient) != 1:
             raise ValueError('Public exponent is not a modular inverse of private exponent.')
+        if f_mod(d, a) != self.exp1 or f_mod(d, b) != self.exp2:
+            raise ValueError('CRT exponents do not match the private exponent.')
+        if f_mod(mpz(self.coefficient) * q, p) != 1:
+            raise ValueError('CRT coefficient is not the inverse of the second prime.')
+        self._checked = True
 
     def convert(self):
-        parameters = (
-            self.pub.modulus,
-            self.pub.exponent,
-            self.exponent,
-            self.prime1,
-            self.prime2,
-            self.coefficient
+        """
+        Returns the key as a PyCryptodome `RsaKey`. The blob is validated first unless
+        this already happened during parsing; the exponents `exp1` and `exp2` are part
+        of that check because `RsaKey` recomputes them from the private exponent.
+        """
+        if self._key is not None:
+            return self._key
+        self._check()
+        from Crypto.PublicKey import RSA
+        from Crypto.Math.Numbers import Integer
+        # The blob stores the CRT coefficient as the inverse of prime2 modulo prime1,
+        # whereas PyCryptodome expects u to be the inverse of p modulo q.
+        self._key = RSA.RsaKey(
+            n=Integer(self.pub.modulus),
+            e=Integer(self.pub.exponent),
+            d=Integer(self.exponent),
+            p=Integer(self.prime2),
+            q=Integer(self.prime1),
+            u=Integer(self.coefficient),
         )
-        try:
-            return RSA.construct(parameters, consistency_check=True)
-        except ValueError as V:
-            try:
-                return RSA.RsaKey(
-                    n=Integer(self.pub.modulus),
-                    e=Integer(self.pub.exponent),
-                    d=Integer(self.exponent),
-                    p=Integer(self.prime1),
-                    q=Integer(self.prime2),
-                    u=Integer(self.coefficient),
-                )
-            except Exception as E:
-                raise E from V
+        return self._key
+
+    @property
+    def pem(self) -> str:
+        if self._pem is None:
+            self._pem = self.convert().export_key(format='PEM').decode('ascii')
+        return self._pem
 
     def __str__(self):
-        return self.key().export_key(format='PEM')
+        return self.pem
 
 
 class DHPUBKEY(Struct):
@@ -181,28 +222,41 @@ class DHPUBKEY(Struct):
         self.generator = reader.read_bigint(self.size)
 
 
+_HANDLERS = {
+    TYPES.PLAINTEXTKEYBLOB : lambda reader, validate: PLAINTEXTKEYBLOB(reader), # noqa
+    TYPES.SIMPLEBLOB       : lambda reader, validate: SIMPLEBLOB(reader),       # noqa
+    TYPES.PRIVATEKEYBLOB   : PRIVATEKEYBLOB,                                    # noqa
+    TYPES.PUBLICKEYBLOB    : lambda reader, validate: RSAPUBKEY(reader),        # noqa
+    TYPES.PUBLICKEYBLOBEX  : lambda reader, validate: DHPUBKEY(reader),         # noqa
+}
+
+_SYMMETRIC = frozenset({
+    TYPES.PLAINTEXTKEYBLOB,
+    TYPES.SIMPLEBLOB,
+})
+
+_RSA_ALGS = frozenset({
+    ALGORITHMS.CALG_RSA_KEYX,
+    ALGORITHMS.CALG_RSA_SIGN,
+})
+
+
 class CRYPTOKEY(Struct):
-    def __init__(self, reader: StructReader):
+    def __init__(self, reader: StructReader, validate: bool = True):
         self.header = BLOBHEADER(reader)
-        if self.header.type in {
-            TYPES.KEYSTATEBLOB,
-            TYPES.OPAQUEKEYBLOB,
-            TYPES.SYMMETRICWRAPKEYBLOB
-        }:
+        try:
+            handler = _HANDLERS[self.header.type]
+        except KeyError:
             raise ValueError(F'Unsupported type: {self.header.type}')
-        elif self.header.type == TYPES.PLAINTEXTKEYBLOB:
-            self.key = PLAINTEXTKEYBLOB(reader)
-        elif self.header.type == TYPES.SIMPLEBLOB:
-            self.key = SIMPLEBLOB(reader)
-        else:
-            if self.header.algorithm not in {
-                ALGORITHMS.CALG_RSA_KEYX,
-                ALGORITHMS.CALG_RSA_SIGN
-            }:
-                raise ValueError(F'Unknown algorithm for {self.header.type}: {self.header.algorithm}')
-            elif self.header.type == TYPES.PRIVATEKEYBLOB:
-                self.key = PRIVATEKEYBLOB(reader)
-            elif self.header.type == TYPES.PUBLICKEYBLOB:
-                self.key = RSAPUBKEY(reader)
-            elif self.header.type == TYPES.PUBLICKEYBLOBEX:
-                self.key = DHPUBKEY(reader)
+        if self.header.type not in _SYMMETRIC and self.header.algorithm not in _RSA_ALGS:
+            raise ValueError(F'Unknown algorithm for {self.header.type}: {self.header.algorithm}')
+        self.key = handler(reader, validate)
+
+
+def parse_many(blobs: Iterable[bytes], validate: bool = True) -> List[CRYPTOKEY]:
+    """
+    Parses each of the given `blobs` as a `refinery.lib.mscrypto.CRYPTOKEY`. The result
+    list has the same order as the input and the first parsing error is raised to the
+    caller.
+    """
+    return [CRYPTOKEY(blob, validate) for blob in blobs]
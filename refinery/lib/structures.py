@@ -48,10 +48,10 @@ class StructMeta(type):
         original__init__ = cls.__init__
 
         @functools.wraps(original__init__)
-        def wrapped__init__(self, data):
+        def wrapped__init__(self, data, *args, **kwargs):
             if not isinstance(data, StructReader):
                 data = StructReader(data)
-            return original__init__(self, data)
+            return original__init__(self, data, *args, **kwargs)
 
         cls.__init__ = wrapped__init__
 
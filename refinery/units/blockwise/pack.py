@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 import re
+import functools
 
 from . import arg, BlockTransformation
 from ...lib.argformats import number
@@ -8,6 +9,35 @@ from ...lib.patterns import formats
 from ..encoding.base import base as base_unit
 
 
+_PREFIXES = {
+    0x02: B'0b',
+    0x08: B'0o',
+    0x10: B'0x',
+}
+
+_FORMATS = {
+    0x02: 'b',
+    0x08: 'o',
+    0x0A: 'd',
+    0x10: 'X',
+}
+
+
+@functools.lru_cache(maxsize=64)
+def _pattern(hexdump: bool, base: int, blocksize: int):
+    if hexdump:
+        return re.compile(
+            BR'(?:\W|^)(?:0x)?([0-9a-f]{%i})h?(?=\s|$)' % (blocksize * 2),
+            re.IGNORECASE
+        )
+    elif base == 0:
+        return formats.integer
+    elif base <= 10:
+        return re.compile(B'(?<![0-9a-zA-Z])[-+]?[0-%d]+(?![0-9a-zA-Z])' % (base - 1))
+    else:
+        return re.compile(B'[-+]?[0-9a-%c]{1,20}' % (0x57 + base), re.IGNORECASE)
+
+
 class pack(BlockTransformation):
     """
     Scans the input data for numeric constants and packs them into a binary
@@ -43,35 +73,28 @@ class pack(BlockTransformation):
 
     def reverse(self, data):
         base = self.args.base or 10
-        prefix = B''
+        prefix = _PREFIXES.get(base, B'') if self.args.prefix else B''
 
         self.log_debug(F'using base {base:d}')
 
-        if self.args.prefix:
-            prefix = {
-                0x02: b'0b',
-                0x08: b'0o',
-                0x10: b'0x'
-            }.get(base, B'')
+        spec = _FORMATS.get(base)
 
-        converter = base_unit(base, self.args.bigendian)
+        if spec is None:
+            converter = base_unit(base, self.args.bigendian)
+            for n in self.chunk(data, raw=True):
+                yield prefix + converter.reverse(n)
+            return
 
-        for n in self.chunk(data, raw=True):
-            yield prefix + converter.reverse(n)
+        for n in self.chunk(data):
+            yield prefix + format(n, spec).encode('ascii')
 
     def process(self, data):
-        if self.args.hexdump:
-            pattern = re.compile(
-                BR'(?:\W|\s|^)(?:0x)?([0-9a-f]{%i})h?(?=\s|$)' % (self.args.blocksize * 2),
-                re.IGNORECASE
-            )
-        elif self.args.base == 0:
-            pattern = formats.integer
-        elif self.args.base <= 10:
-            pattern = re.compile(B'[-+]?[0-%d]{1,64}' % (self.args.base - 1))
-        else:
-            pattern = re.compile(B'[-+]?[0-9a-%c]{1,20}' % (0x57 + self.args.base), re.IGNORECASE)
-
-        items = pattern.findall(data)
-        items = [int(n, self.args.base) & self.fmask for n in items]
+        pattern = _pattern(self.args.hexdump, self.args.base, self.args.blocksize)
+        group = 1 if self.args.hexdump else 0
+        items = (match.group(group) for match in pattern.finditer(data))
+        if self.args.hexdump and self.args.blocksize == 1:
+            return bytes.fromhex(B''.join(items).decode('ascii'))
+        base = self.args.base
+        mask = self.fmask
+        items = (int(n, base) & mask for n in items)
         return self.unchunk(items)
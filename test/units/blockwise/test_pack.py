@@ -2,6 +2,8 @@
 # -*- coding: utf-8 -*-
 import struct
 
+from refinery.lib import chunks
+
 from .. import TestUnitBase
 
 
@@ -35,6 +37,31 @@ class TestPack(TestUnitBase):
             struct.pack('>HHHHH', 0xBAAD, 0xF00D, 0xFACE, 0xC0CA, 0xC01A)
         )
 
+    def test_pack_odd_blocksize(self):
+        for bigendian in (False, True):
+            pack = self.load(blocksize=3, bigendian=bigendian)
+            order = 'big' if bigendian else 'little'
+            self.assertEqual(
+                pack(B'0xBAAD, 0xC0FFEE, 0x1F00BA5'),
+                B''.join(n.to_bytes(3, order) for n in (0xBAAD, 0xC0FFEE, 0xF00BA5))
+            )
+
+    def test_pack_odd_blocksize_overflow(self):
+        for bigendian in (False, True):
+            with self.assertRaises(OverflowError):
+                chunks.pack([0xBAAD, 0x1234567], 3, bigendian)
+
+    def test_pack_binary_ignores_partial_tokens(self):
+        pack = self.load(2)
+        self.assertEqual(pack(B'101, 0123, 11, 1x0, 110'), bytes((5, 3, 6)))
+
+    def test_pack_binary_wide_number(self):
+        pack = self.load(2, blocksize=16)
+        self.assertEqual(
+            pack(B'1' * 70 + B' 11'),
+            ((1 << 70) - 1).to_bytes(16, 'little') + (3).to_bytes(16, 'little')
+        )
+
     def test_pack_bigblock(self):
         bigint = 0xAB0F4E70B00A20391B0BB03C92D8110CE33017BE
         buffer = bigint.to_bytes(20, 'big')
@@ -1,8 +1,10 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 from inspect import getdoc
+from Crypto.PublicKey import RSA
 
 from ... import TestUnitBase
+from ....lib.test_mscrypto import private_key_blob
 
 
 class TestRSA(TestUnitBase):
@@ -89,6 +91,23 @@ class TestRSA(TestUnitBase):
         C = E(M)
         self.assertEqual(D(C), M)
 
+    def _private_key_blob(self):
+        return private_key_blob(RSA.import_key(self.key_private))
+
+    def test_private_key_blob(self):
+        M = self.generate_random_buffer(200)
+        E = self.load(self.key_public, reverse=True)
+        D = self.load(self._private_key_blob())
+        self.assertEqual(D(E(M)), M)
+
+    def test_private_key_blob_corrupted(self):
+        blob = self._private_key_blob()
+        for offset in (20, len(blob) - 1):
+            corrupted = bytearray(blob)
+            corrupted[offset] ^= 1
+            with self.assertRaises(ValueError):
+                self.load(bytes(corrupted))
+
     def test_invertible_02(self):
         M = self.generate_random_buffer(200)
         E = self.load(self.key_private, rsautl=True, reverse=True)